@@ -1,7 +1,57 @@
 """Annotations analyse: quantity, bbox scale, position, distribution."""
-from typing import List, Tuple, Union, Set, Dict
+from glob import glob
+import io
+from typing import Iterator, List, NamedTuple, Tuple, Union, Set, Dict
 
-from helpers.path_and_files_processing import combine_path
+import numpy as np
+
+from helpers.path_and_files_processing import combine_path, map_in_threads
+from helpers.yolo_txt_parsing import parse_class_ids
+
+# files parsed at once, bounds the memory used for a large dataset
+_BATCH_FILES = 512
+
+
+class AnnotationSoA(NamedTuple):
+    """Txt (YOLO) annotations of a dataset, column per field."""
+
+    class_id: np.ndarray
+    cx: np.ndarray
+    cy: np.ndarray
+    w: np.ndarray
+    h: np.ndarray
+
+
+def _read_bytes(path: str) -> bytes:
+    """Reads the whole file.
+
+    Args:
+        path (str): path to file
+
+    Returns:
+        bytes: file content
+    """
+    with open(path, 'rb') as file:
+        return file.read()
+
+
+def _read_batches(path: str, filename: str) -> Iterator[bytes]:
+    """Reads matching txt annotations, `_BATCH_FILES` files at once.
+
+    Files of a batch are joined with a newline, so a file without the
+    trailing newline does not merge with the next one.
+
+    Args:
+        path (str): path to txt annotations
+        filename (str): filename or, if read all the files, pass *
+
+    Yields:
+        Iterator[bytes]: content of a batch of files
+    """
+    paths = glob(combine_path(path, filename))
+    for first in range(0, len(paths), _BATCH_FILES):
+        batch = paths[first : first + _BATCH_FILES]
+        yield b'\n'.join(map_in_threads(_read_bytes, batch))
 
 
 def counter(
@@ -25,10 +75,35 @@ def counter(
         pairs
     """
     cnt = {cl: 0 for cl in classes}
-    for txt_file in combine_path(path, filename):
-        with open(txt_file, encoding='utf-8') as txt:
-            while clss := txt.readline().split(' ', 1)[0]:
-                if clss not in cnt:
-                    cnt[clss] = -1
-                cnt[clss] += 1
+    for data in _read_batches(path, filename):
+        class_ids = parse_class_ids(np.frombuffer(data, np.uint8))[0]
+        # unlike np.bincount, handles negative and sparse large ids
+        found, amounts = np.unique(class_ids, return_counts=True)
+        for clss, amount in zip(found.tolist(), amounts.tolist()):
+            cnt[clss] = cnt.get(clss, 0) + amount
     return sorted(cnt.items())
+
+
+def load_annotations_soa(path: str, filename: str = '*') -> AnnotationSoA:
+    """Loads all annotations at once, so statistics (distribution,
+    scale, position) are computed with NumPy instead of re-parsing the
+    files.
+
+    Args:
+        path (str): path to txt annotations
+        filename (str, optional): load specific file. Defaults to '*' -
+        load all files.
+
+    Returns:
+        AnnotationSoA: int32 class ids and float32 coordinates of every
+        object
+    """
+    tables = [np.empty((0, 5), dtype=np.float32)]
+    for data in _read_batches(path, filename):
+        if data.strip():
+            tables.append(np.loadtxt(io.BytesIO(data), dtype=np.float32, ndmin=2))
+    table = np.concatenate(tables)
+    return AnnotationSoA(
+        table[:, 0].astype(np.int32),
+        *(np.ascontiguousarray(column) for column in table[:, 1:5].T),
+    )
@@ -1,18 +1,29 @@
 """Work with annotations any format"""
-import json
+from contextlib import suppress
 import os
 from glob import glob
-from typing import Any, Dict, List, Tuple, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import orjson
 
 from helpers.path_and_files_processing import (
     combine_path,
     create_dir,
     get_filename,
     get_files,
-    read_and_update,
+    map_in_threads,
+    rewrite_files,
 )
+from helpers.yolo_txt_parsing import parse_class_ids
 
-YOLO_FORMAT = '%(class_id)s %(x)s %(y)s %(w)s %(h)s'
+# filled with a class first, then with the coordinates of each object
+_YOLO_LINE = '{} {{:.6f}} {{:.6f}} {{:.6f}} {{:.6f}}\n'
+# below that many lines NumPy set-up costs more than a per-line loop
+_VECTORIZE_MIN_LINES = 150
+# classes configs with larger (or negative) classes are not turned into
+# a lookup table
+_LUT_MAX_CLASS = 1 << 16
 
 
 def bbox2yolo(
@@ -41,6 +52,27 @@ def bbox2yolo(
     return x, y, w, h
 
 
+def bbox2yolo_batch(width: int, height: int, boxes: np.ndarray) -> np.ndarray:
+    """Convert bounding boxes (rectangles) to the YOLO format at once.
+
+    Vectorized version of `bbox2yolo`.
+
+    Args:
+        width (int): image width
+        height (int): image height
+        boxes (np.ndarray): (N, 4) array of xmin, ymin, xmax, ymax
+
+    Returns:
+        np.ndarray: (N, 4) float64 array of scaled (YOLO) coordinates:
+        centre points (x, y), rectangle size (width, height)
+    """
+    x = (boxes[:, 0] + boxes[:, 2]) * (0.5 / width)
+    y = (boxes[:, 1] + boxes[:, 3]) * (0.5 / height)
+    w = (boxes[:, 2] - boxes[:, 0]) * (1.0 / width)
+    h = (boxes[:, 3] - boxes[:, 1]) * (1.0 / height)
+    return np.column_stack((x, y, w, h))
+
+
 def yolo2bbox(
     x: float, y: float, w: float, h: float, img_width: int, img_height: int
 ) -> Tuple[int, int, int, int]:
@@ -71,6 +103,184 @@ def yolo2bbox(
     return left, top, right, bottom
 
 
+def yolo2bbox_batch(
+    xywh: np.ndarray, img_width: int, img_height: int
+) -> np.ndarray:
+    """Convert scaled (YOLO) coordinates to bounding boxes (rectangles)
+    at once.
+
+    Vectorized version of `yolo2bbox`.
+
+    Args:
+        xywh (np.ndarray): (N, 4) array of centre points (x, y) and
+        rectangle sizes (width, height)
+        img_width (int): image width
+        img_height (int): image height
+
+    Returns:
+        np.ndarray: (N, 4) int32 array of top left points (min x, y)
+        and bottom right points (max x, y)
+    """
+    size = np.array((img_width, img_height))
+    half = xywh[:, 2:4] * 0.5
+    # truncate towards 0 as `int` does
+    mins = np.trunc((xywh[:, 0:2] - half) * size).astype(np.int32)
+    maxs = np.trunc((xywh[:, 0:2] + half) * size).astype(np.int32)
+    return np.concatenate(
+        (np.maximum(mins, 0), np.minimum(maxs, size - 1)), axis=1
+    ).astype(np.int32)
+
+
+def _touch(path: str, flags: int = 0) -> None:
+    """Create a file without building a Python file object.
+
+    Args:
+        path (str): path to file
+        flags (int, optional): extra `os.open` flags, e.g. `os.O_TRUNC`
+        to empty an existing file. Defaults to 0.
+    """
+    os.close(os.open(path, os.O_WRONLY | os.O_CREAT | flags, 0o666))
+
+
+def _touch_missing(path: str) -> None:
+    """Create a file only if it does not exist. Existing files are not
+    opened at all, so read-only ones are skipped too.
+
+    Args:
+        path (str): path to file
+    """
+    with suppress(FileExistsError):
+        _touch(path, os.O_EXCL)
+
+
+def _load_json(path: str) -> Any:
+    """Parse JSON file with `orjson`.
+
+    Args:
+        path (str): path to JSON file
+
+    Returns:
+        Any: parsed JSON
+    """
+    with open(path, 'rb') as js:
+        return orjson.loads(js.read())
+
+
+def _class_lut(config: Dict[int, int]) -> Optional[np.ndarray]:
+    """Build a lookup table for `_remap_classes` from a classes config.
+
+    Args:
+        config (Dict[int, int]): update class with: key - old, value -
+        new. Classes out of the config are removed.
+
+    Returns:
+        Optional[np.ndarray]: new class for each old one, -1 for the
+        removed ones. The last item is -1: ids past the table are
+        clipped to it. None if a class in `config` is negative or
+        larger than `_LUT_MAX_CLASS`.
+    """
+    if any(not 0 <= clss <= _LUT_MAX_CLASS for clss in config):
+        return None
+    # trailing -1 removes classes out of the config
+    lut = np.full(max(config, default=-1) + 2, -1, dtype=np.int64)
+    lut[list(config)] = list(config.values())
+    return lut
+
+
+def _remap_lines(data: bytes, config: Dict[int, int]) -> bytes:
+    """Replace classes in txt (YOLO) annotations line by line.
+
+    Same result as `_remap_classes` for small files, where the NumPy
+    set-up costs more than the loop.
+
+    Args:
+        data (bytes): raw txt annotations
+        config (Dict[int, int]): update class with: key - old, value -
+        new. Classes out of the config are removed.
+
+    Returns:
+        bytes: updated annotations
+    """
+    new_file = []
+    start = 0
+    while start < len(data):
+        end = data.find(b'\n', start) + 1 or len(data)
+        line = data[start:end]
+        start = end
+        if line == b'\n':
+            continue
+
+        stop = line.find(b' ')
+        if stop < 0:
+            stop = len(line) - line.endswith(b'\n')
+        clss = config.get(int(line[:stop]), -1)
+        if clss >= 0:
+            new_file.append(b'%d%s' % (clss, line[stop:]))
+    return b''.join(new_file)
+
+
+def _remap_classes(
+    data: bytes, config: Dict[int, int], lut: Optional[np.ndarray]
+) -> bytes:
+    """Replace classes in txt (YOLO) annotations using a lookup table.
+
+    Class ids are parsed and mapped for the whole file at once, kept
+    lines are stitched from the new class and the rest of the old line.
+    Small files, or configs without a lookup table, are processed line
+    by line with `config` instead.
+
+    Args:
+        data (bytes): raw txt annotations
+        config (Dict[int, int]): update class with: key - old, value -
+        new. Classes out of the config are removed.
+        lut (Optional[np.ndarray]): `config` as a lookup table, see
+        `_class_lut`
+
+    Returns:
+        bytes: updated annotations
+    """
+    if lut is None or data.count(b'\n') < _VECTORIZE_MIN_LINES:
+        return _remap_lines(data, config)
+
+    class_ids, _, stops, ends = parse_class_ids(np.frombuffer(data, np.uint8))
+    new_ids = np.take(lut, class_ids, mode='clip')
+    new_ids[class_ids < 0] = -1
+    keep = new_ids >= 0
+    return b''.join(
+        b'%d%s' % (clss, data[stop:end])
+        for clss, stop, end in zip(
+            new_ids[keep].tolist(), stops[keep].tolist(), ends[keep].tolist()
+        )
+    )
+
+
+class _LineFormats(dict):
+    """YOLO line templates per JSON class, built on the first use."""
+
+    def __init__(self, map_class: Callable[[int], int]) -> None:
+        """Map JSON classes with `map_class` when building templates.
+
+        Args:
+            map_class (Callable[[int], int]): maps JSON class Id to the
+            YOLO class
+        """
+        super().__init__()
+        self.map_class = map_class
+
+    def __missing__(self, class_id: int) -> Callable[..., str]:
+        """Build and keep the template of a new JSON class.
+
+        Args:
+            class_id (int): JSON class Id
+
+        Returns:
+            Callable[..., str]: formats x, y, w, h into a YOLO line
+        """
+        line_format = _YOLO_LINE.format(self.map_class(class_id)).format
+        self[class_id] = line_format
+        return line_format
+
+
 class TXTAnnotations:
     """Process txt (YOLO) annotations files."""
 
@@ -87,7 +297,7 @@ class TXTAnnotations:
             txt_path (str, optional): path to txt annotations. Defaults
             to f'{os.getcwd()}/txt_annotations/'.
             classes_config (Union[tuple, Tuple[int], List[int]]): a
-            sorted list of classes. Defaults to ().
+            sorted list of unique classes. Defaults to ().
         """
         self.images_path = images_path
         self.txt_path = create_dir(txt_path)
@@ -119,8 +329,9 @@ class TXTAnnotations:
             filename (str, optional): file name without its path.
             Defaults to *.
         """
-        for txt in get_files(self.txt_path, filename):
-            open(txt, 'w', encoding='utf-8').close()
+        map_in_threads(
+            lambda txt: _touch(txt, os.O_TRUNC), get_files(self.txt_path, filename)
+        )
 
     def add_txt(self, filename: str = '*.[!txt]*') -> None:
         """Add empty txt annotations to the pictures with no annotations.
@@ -132,10 +343,10 @@ class TXTAnnotations:
             filename (str, optional): file name without its path.
             Defaults to `*.[!txt]*` (find no .txt files).
         """
-        for img in get_files(self.images_path, filename):
-            txt_file = combine_path(self.txt_path, get_filename(img))
-            if not os.path.exists(txt_file):
-                open(txt_file, 'w+', encoding='utf-8').close()
+        map_in_threads(
+            lambda img: _touch_missing(combine_path(self.txt_path, get_filename(img))),
+            get_files(self.images_path, filename),
+        )
 
     def update_classes(self, to_remove: Union[Tuple[int], List[int]]) -> Dict[int, int]:
         """Shifts untouched classes to start from 0.
@@ -173,14 +384,15 @@ class TXTAnnotations:
         if not self.classes_config:
             raise ValueError('Classes config was not passed.')
 
+        to_remove = frozenset(to_remove)
         keep = {}
         shift = 0
 
+        # classes config is sorted and unique, each class is seen once
         for old_class in self.classes_config:
             if old_class in to_remove:
                 shift += 1
-
-            elif old_class not in keep:
+            else:
                 keep[old_class] = old_class - shift
         return keep
 
@@ -195,11 +407,12 @@ class TXTAnnotations:
             filename (str, optional): remove class(es) for specific
             file. Defaults to '*'.
         """
-        read_and_update(
+        config = self.update_classes(to_remove)
+        lut = _class_lut(config)
+        rewrite_files(
             self.txt_path,
             filename,
-            self.upd_line,
-            {'config': self.update_classes(to_remove)},
+            lambda data: _remap_classes(data, config, lut),
         )
 
     def replace_classes(
@@ -214,8 +427,11 @@ class TXTAnnotations:
             file. Defaults to '*'.
         """
         self.classes_config = to_replace_with
-        read_and_update(
-            self.txt_path, filename, self.upd_line, {'config': to_replace_with}
+        lut = _class_lut(to_replace_with)
+        rewrite_files(
+            self.txt_path,
+            filename,
+            lambda data: _remap_classes(data, to_replace_with, lut),
         )
 
 
@@ -261,22 +477,25 @@ class JSON2TXT(TXTAnnotations):
             filename (str, optional): name of the file to create txt
             annotations for. Defaults to '*'.
         """
+        # line template per JSON class, so the class is not mapped and
+        # formatted for each object
+        line_formats = _LineFormats(self.map_class)
+
         for json_file in glob(f'{self.json_path}/{filename}'):
             txt_file = combine_path(self.txt_path, get_filename(json_file))
-            with open(json_file, 'r', encoding='utf-8') as js, open(
-                txt_file, 'w+', encoding='utf-8'
-            ) as txt:
-                data = json.load(js)
-
-                image_size = data['size']
-                width, height = image_size['width'], image_size['height']
-
-                for obj in data['objects']:
-                    points = obj['points']['exterior']
-                    xmin, ymin = points[0]
-                    xmax, ymax = points[-1]
-
-                    x, y, w, h = bbox2yolo(width, height, xmin, ymin, xmax, ymax)
-                    class_id = self.map_class(obj['classId'])
-
-                    txt.write(f'{YOLO_FORMAT % locals()}\n')
+            data = _load_json(json_file)
+
+            image_size = data['size']
+            width, height = image_size['width'], image_size['height']
+
+            objects = data['objects']
+            exteriors = [obj['points']['exterior'] for obj in objects]
+            boxes = np.array(
+                [(*ext[0], *ext[-1]) for ext in exteriors], dtype=np.float64
+            ).reshape(-1, 4)
+            formats = [line_formats[obj['classId']] for obj in objects]
+            coords = bbox2yolo_batch(width, height, boxes).T.tolist()
+            lines = [fmt(x, y, w, h) for fmt, x, y, w, h in zip(formats, *coords)]
+
+            with open(txt_file, 'w+', encoding='utf-8') as txt:
+                txt.write(''.join(lines))
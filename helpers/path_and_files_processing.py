@@ -1,8 +1,46 @@
 """Use directory structure and path processing"""
+from concurrent.futures import ThreadPoolExecutor
+import fnmatch
+from functools import lru_cache, partial
 from glob import glob
+import io
 import os
 from pathlib import Path
-from typing import List, Union, Callable
+import re
+import time
+from typing import (
+    Any,
+    Callable,
+    Iterable,
+    List,
+    Optional,
+    Pattern,
+    Tuple,
+    Union,
+)
+
+# threads for file I/O bound loops, the GIL is released while reading
+IO_WORKERS = (os.cpu_count() or 1) * 2
+
+# a folder modified within this period may still change within the same
+# mtime tick, so its listing is not cached
+_RACY_MTIME_NS = 1_000_000_000
+
+
+def map_in_threads(func: Callable, items: Iterable) -> List[Any]:
+    """Applies `func` to each item in parallel threads, for file I/O
+    bound work.
+
+    Args:
+        func (Callable): operation to perform for each item
+        items (Iterable): items to process, e.g. file paths
+
+    Returns:
+        List[Any]: results in the order of `items`. Errors from the
+        threads are re-raised.
+    """
+    with ThreadPoolExecutor(max_workers=IO_WORKERS) as executor:
+        return list(executor.map(func, items))
 
 
 def create_dir(path: str) -> str:
@@ -27,7 +65,7 @@ def get_filename(path: str) -> str:
     Returns:
         str: filename
     """
-    return os.path.split(path)[-1].split('.', 1)[0]
+    return os.path.basename(path).partition('.')[0]
 
 
 def combine_path(
@@ -54,9 +92,40 @@ def combine_path(
     return f'{folder}/{filename}.{extension}'
 
 
+@lru_cache(maxsize=None)
+def _compile_pattern(filename: str) -> Pattern:
+    """Compiles shell-style `filename` pattern to a regular expression.
+
+    Args:
+        filename (str): filename pattern
+
+    Returns:
+        Pattern: compiled pattern
+    """
+    return re.compile(fnmatch.translate(filename))
+
+
+@lru_cache(maxsize=32)
+def _list_files(folder: str, mtime_ns: int) -> Tuple[Tuple[str, str], ...]:
+    """Lists files in the folder. Cached until the folder is modified.
+
+    Args:
+        folder (str): folder path
+        mtime_ns (int): folder modification time, used as a cache key
+
+    Returns:
+        Tuple[Tuple[str, str], ...]: (filename, path) pairs
+    """
+    with os.scandir(folder) as entries:
+        return tuple((entry.name, entry.path) for entry in entries if entry.is_file())
+
+
 def get_files(folder: str, filename: str) -> List[str]:
     """List all files using expression
 
+    Hidden files are matched only if `filename` starts with a dot, same
+    as `glob`. Patterns with a directory part are passed to `glob`.
+
     Args:
         folder (str): folder path
         filename (str): filename
@@ -64,28 +133,109 @@ def get_files(folder: str, filename: str) -> List[str]:
     Returns:
         List[str]: path to files
     """
-    return glob(combine_path(folder, filename, None))
+    if '/' in filename or os.sep in filename:
+        return glob(combine_path(folder, filename, None))
+
+    try:
+        mtime_ns = os.stat(folder).st_mtime_ns
+    except FileNotFoundError:
+        return []
+    if time.time_ns() - mtime_ns < _RACY_MTIME_NS:
+        files = _list_files.__wrapped__(folder, mtime_ns)
+    else:
+        files = _list_files(folder, mtime_ns)
+
+    if filename == '*':
+        return [path for name, path in files if not name.startswith('.')]
+    # case-insensitive on Windows, same as `glob`
+    pattern = _compile_pattern(os.path.normcase(filename))
+    hidden = filename.startswith('.')
+    return [
+        path
+        for name, path in files
+        if pattern.match(os.path.normcase(name))
+        and (hidden or not name.startswith('.'))
+    ]
+
+
+def _rewrite_file(path: str, transform: Callable[[bytes], bytes]) -> None:
+    """Rewrites a single file with `transform` applied to its content.
+
+    The file is read and written back in place with a single call each,
+    so its permissions and symlinks are kept.
+
+    Args:
+        path (str): path to file
+        transform (Callable[[bytes], bytes]): operation to perform on
+        the whole file content
+    """
+    with open(path, 'r+b') as file:
+        data = transform(file.read())
+        file.seek(0)
+        file.write(data)
+        file.truncate()
+
+
+def _update_lines(data: bytes, inner_func: Callable) -> bytes:
+    """Updates file content line by line using `inner_func`. Lines for
+    which `inner_func` returns an empty str are removed.
+
+    Same as a file opened in text mode: lines are read with universal
+    newlines (end with '\n') and '\n' is written as `os.linesep`.
+
+    Args:
+        data (bytes): file content
+        inner_func (Callable): operation to perform for each line
+
+    Returns:
+        bytes: updated file content
+    """
+    lines = io.StringIO(data.decode('utf-8'), newline=None)
+    text = ''.join(filter(None, map(inner_func, lines)))
+    if os.linesep != '\n':
+        text = text.replace('\n', os.linesep)
+    return text.encode('utf-8')
+
+
+def rewrite_files(
+    path: str, filename: str, transform: Callable[[bytes], bytes]
+) -> None:
+    """Rewrites file(s) with `transform` applied to the whole content.
+
+    Files are processed in parallel threads.
+
+    Args:
+        path (str): path to file(s)
+        filename (str): filename or, if iterate over all the files,
+        pass *
+        transform (Callable[[bytes], bytes]): operation to perform on
+        the file content
+    """
+    map_in_threads(
+        lambda file: _rewrite_file(file, transform), get_files(path, filename)
+    )
 
 
 def read_and_update(
-    path: str, filename: str, inner_func: Callable, inner_vars: dict = {}
+    path: str,
+    filename: str,
+    inner_func: Callable,
+    inner_vars: Optional[dict] = None,
 ) -> None:
     """Reads file line by line and updates it using `inner_func`.
 
+    Files are processed one by one, so `inner_func` may keep a state.
+
     Args:
         path (str): path to file(s)
         filename (str): filename or, if iterate over all the files,
         pass *
         inner_func (Callable): operation to perform for each line.
         Output of the function is always `str`.
-        inner_vars (dict, optional): arguments to pass to `inner_func`.
-        Defaults to {}.
+        inner_vars (Optional[dict], optional): arguments to pass to
+        `inner_func`. Defaults to None.
     """
-    for files in get_files(path, filename):
-        with open(files, 'r+', encoding='utf-8') as file:
-            new_file = file.readlines()
-            file.seek(0)
-            for line in new_file:
-                if out := inner_func(line, **inner_vars):
-                    file.write(out)
-            file.truncate()
+    if inner_vars:
+        inner_func = partial(inner_func, **inner_vars)
+    for file in get_files(path, filename):
+        _rewrite_file(file, lambda data: _update_lines(data, inner_func))
@@ -0,0 +1,54 @@
+"""Parse raw txt (YOLO) annotations"""
+from typing import Tuple
+
+import numpy as np
+
+_NEWLINE = ord('\n')
+_SPACE = ord(' ')
+_ZERO = ord('0')
+
+
+def parse_class_ids(
+    buf: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Parse the class id of each line in txt (YOLO) annotations.
+
+    Empty lines are skipped. Class ids which are not plain digits are
+    parsed with `int`, same as reading the file line by line.
+
+    Args:
+        buf (np.ndarray): raw txt annotations as a uint8 array
+
+    Raises:
+        ValueError: a class id is not a number
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: class
+        ids, line starts, class ids ends (the rest of the line starts
+        there) and line ends (including the newline)
+    """
+    newlines = np.flatnonzero(buf == _NEWLINE)
+    starts = np.concatenate(([0], newlines + 1))
+    eols = np.append(newlines, buf.size)
+    ends = np.minimum(eols + 1, buf.size)
+    spaces = np.append(np.flatnonzero(buf == _SPACE), buf.size)
+    stops = np.minimum(spaces[np.searchsorted(spaces, starts)], eols)
+
+    lines = starts < eols
+    starts, stops, ends = starts[lines], stops[lines], ends[lines]
+
+    # uint8 wraps bytes below '0' past 9 as well
+    non_digits = np.concatenate(([0], np.cumsum(buf - _ZERO > 9)))
+    lengths = stops - starts
+    invalid = (non_digits[stops] > non_digits[starts]) | (lengths == 0)
+    lengths[invalid] = 0
+
+    class_ids = np.zeros(starts.size, dtype=np.int64)
+    for digit in range(lengths.max(initial=0)):
+        has_digit = lengths > digit
+        class_ids[has_digit] = (
+            class_ids[has_digit] * 10 + buf[starts[has_digit] + digit] - _ZERO
+        )
+    for line in np.flatnonzero(invalid).tolist():
+        class_ids[line] = int(buf[starts[line] : stops[line]].tobytes())
+    return class_ids, starts, stops, ends
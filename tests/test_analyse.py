@@ -0,0 +1,70 @@
+"""Annotations analyse."""
+import numpy as np
+import pytest
+
+import dl.annotate.analyse as analyse
+from dl.annotate.analyse import counter, load_annotations_soa
+
+# no trailing newline, empty lines, an empty file, multi-digit classes
+FILES = {
+    'a': '0 0.1 0.2 0.3 0.4\n12 0.5 0.5 0.1 0.1\n0 0.2 0.2 0.2 0.2',
+    'b': '',
+    'c': '\n3 0.1 0.1 0.1 0.1\n\n105 0.9 0.9 0.1 0.1\n',
+    'd': '12 0.3 0.3 0.3 0.3\n',
+}
+
+
+@pytest.fixture
+def txt_path(tmp_path):
+    for name, content in FILES.items():
+        (tmp_path / f'{name}.txt').write_text(content, encoding='utf-8')
+    return tmp_path
+
+
+def expected_lines():
+    return [
+        line.split()
+        for content in FILES.values()
+        for line in content.split('\n')
+        if line
+    ]
+
+
+@pytest.mark.parametrize('batch_files', [1, 2, 512])
+def test_counter(txt_path, monkeypatch, batch_files):
+    monkeypatch.setattr(analyse, '_BATCH_FILES', batch_files)
+    expected = {}
+    for line in expected_lines():
+        expected[int(line[0])] = expected.get(int(line[0]), 0) + 1
+    expected[7] = 0
+
+    assert counter(str(txt_path), classes=(0, 7)) == sorted(expected.items())
+
+
+def test_counter_single_file(txt_path):
+    assert counter(str(txt_path), 'a') == [(0, 2), (12, 1)]
+
+
+def test_counter_no_files(tmp_path):
+    assert counter(str(tmp_path), classes=(1,)) == [(1, 0)]
+
+
+@pytest.mark.parametrize('batch_files', [1, 512])
+def test_load_annotations_soa(txt_path, monkeypatch, batch_files):
+    monkeypatch.setattr(analyse, '_BATCH_FILES', batch_files)
+    soa = load_annotations_soa(str(txt_path))
+    rows = sorted(zip(*(column.tolist() for column in soa)))
+    expected = np.array(expected_lines(), dtype=np.float32)
+
+    assert rows == sorted(map(tuple, expected.astype(object).tolist()))
+    assert soa.class_id.dtype == np.int32
+    for column in soa[1:]:
+        assert column.dtype == np.float32
+        assert column.flags['C_CONTIGUOUS']
+
+
+def test_load_annotations_soa_no_objects(tmp_path):
+    (tmp_path / 'empty.txt').write_text('', encoding='utf-8')
+    soa = load_annotations_soa(str(tmp_path))
+
+    assert all(len(column) == 0 for column in soa)
@@ -0,0 +1,75 @@
+"""Directory structure and path processing."""
+from glob import glob
+import os
+import time
+
+import pytest
+
+import helpers.path_and_files_processing as files_processing
+from helpers.path_and_files_processing import get_files, read_and_update
+
+# folder modification time outside the racy period
+OLD_MTIME_NS = 1_600_000_000 * 10**9
+
+
+@pytest.fixture
+def folder(tmp_path):
+    for name in ('a.jpg', 'b.png', 'c.txt', 'D.JPG', '.hidden', '.h.txt'):
+        (tmp_path / name).touch()
+    (tmp_path / 'sub').mkdir()
+    (tmp_path / 'sub' / 'x.txt').touch()
+    (tmp_path / 'sub' / 'y.jpg').touch()
+    return tmp_path
+
+
+@pytest.mark.parametrize(
+    'filename',
+    ['*', '*.[!txt]*', '*.txt', 'a.jpg', '.*', 'missing', 'sub/*.txt', 'sub/x.txt'],
+)
+def test_get_files_same_as_glob(folder, filename):
+    expected = [
+        path for path in glob(f'{folder}/{filename}') if os.path.isfile(path)
+    ]
+    assert sorted(get_files(str(folder), filename)) == sorted(expected)
+
+
+def test_get_files_missing_folder(tmp_path):
+    assert get_files(str(tmp_path / 'missing'), '*') == []
+
+
+def test_get_files_cached_until_folder_modified(folder):
+    files_processing._list_files.cache_clear()
+    os.utime(folder, ns=(OLD_MTIME_NS, OLD_MTIME_NS))
+    first = get_files(str(folder), '*')
+    assert get_files(str(folder), '*') == first
+    assert files_processing._list_files.cache_info().hits == 1
+
+    (folder / 'new.txt').touch()
+    os.utime(folder, ns=(OLD_MTIME_NS + 1, OLD_MTIME_NS + 1))
+    assert f'{folder}/new.txt' in get_files(str(folder), '*')
+
+
+def test_get_files_racy_folder_not_cached(folder):
+    files_processing._list_files.cache_clear()
+    mtime_ns = time.time_ns()
+    os.utime(folder, ns=(mtime_ns, mtime_ns))
+    get_files(str(folder), '*')
+
+    # a change within the same mtime tick is still seen
+    (folder / 'new.txt').touch()
+    os.utime(folder, ns=(mtime_ns, mtime_ns))
+    assert f'{folder}/new.txt' in get_files(str(folder), '*')
+    assert files_processing._list_files.cache_info().currsize == 0
+
+
+def test_read_and_update_universal_newlines(tmp_path):
+    (tmp_path / 'a.txt').write_bytes(b'a\r\nb\r\nc\rd')
+    lines = []
+
+    def upper(line: str) -> str:
+        lines.append(line)
+        return '' if line.startswith('b') else line.upper()
+
+    read_and_update(str(tmp_path), 'a.txt', upper)
+    assert lines == ['a\n', 'b\n', 'c\n', 'd']
+    assert (tmp_path / 'a.txt').read_text(encoding='utf-8') == 'A\nC\nD'
@@ -0,0 +1,155 @@
+"""Txt (YOLO) annotations processing."""
+import json
+
+import numpy as np
+import pytest
+
+from dl.annotate.processing import (
+    _VECTORIZE_MIN_LINES,
+    JSON2TXT,
+    TXTAnnotations,
+    bbox2yolo,
+    bbox2yolo_batch,
+    yolo2bbox,
+    yolo2bbox_batch,
+)
+
+# multi-digit classes, an empty line, the last line has no newline
+BLOCK = (
+    '12 0.1 0.2 0.3 0.4\n'
+    '\n'
+    '3 0.5 0.5 0.1 0.1\n'
+    '105 0.2 0.2 0.2 0.2\n'
+    '7 0.9 0.9 0.1 0.1\n'
+)
+
+# small files are processed line by line, large ones with NumPy
+SIZES = (1, _VECTORIZE_MIN_LINES)
+
+
+def write_txt(path, content: str) -> TXTAnnotations:
+    (path / 'a.txt').write_text(content, encoding='utf-8')
+    return TXTAnnotations(str(path), str(path), tuple(range(106)))
+
+
+def read_txt(path) -> str:
+    return (path / 'a.txt').read_text(encoding='utf-8')
+
+
+@pytest.mark.parametrize('repeat', SIZES)
+def test_replace_classes(tmp_path, repeat):
+    annotations = write_txt(tmp_path, (BLOCK * repeat)[:-1])
+    annotations.replace_classes({12: 0, 105: 11, 7: 7})
+    expected = (
+        '0 0.1 0.2 0.3 0.4\n'
+        '11 0.2 0.2 0.2 0.2\n'
+        '7 0.9 0.9 0.1 0.1\n'
+    ) * repeat
+    assert read_txt(tmp_path) == expected[:-1]
+
+
+@pytest.mark.parametrize('repeat', SIZES)
+def test_remove_class(tmp_path, repeat):
+    annotations = write_txt(tmp_path, BLOCK * repeat)
+    annotations.remove_class((3, 12))
+    expected = '103 0.2 0.2 0.2 0.2\n6 0.9 0.9 0.1 0.1\n'
+    assert read_txt(tmp_path) == expected * repeat
+
+
+@pytest.mark.parametrize('repeat', SIZES)
+def test_negative_class_removed(tmp_path, repeat):
+    annotations = write_txt(tmp_path, '-1 0.1 0.1 0.1 0.1\n' * repeat)
+    annotations.replace_classes({0: 1})
+    assert read_txt(tmp_path) == ''
+
+
+@pytest.mark.parametrize('repeat', SIZES)
+@pytest.mark.parametrize('line', [' 2 0.3 0.3\n', '1\t0.5 0.5\n', 'x 0.1\n'])
+def test_malformed_class_raises(tmp_path, repeat, line):
+    annotations = write_txt(tmp_path, BLOCK * repeat + line)
+    with pytest.raises(ValueError):
+        annotations.replace_classes({3: 0})
+
+
+@pytest.mark.parametrize('repeat', SIZES)
+@pytest.mark.parametrize(
+    'config', [{-1: 5, 0: 1}, {10**9: 5, 0: 1, -1: 5}], ids=['negative', 'huge']
+)
+def test_config_without_lookup_table(tmp_path, repeat, config):
+    annotations = write_txt(
+        tmp_path,
+        ('3 0.1 0.1 0.1 0.1\n-1 0.2 0.2 0.2 0.2\n0 0.3 0.3 0.3 0.3\n') * repeat,
+    )
+    annotations.replace_classes(config)
+    expected = '5 0.2 0.2 0.2 0.2\n1 0.3 0.3 0.3 0.3\n' * repeat
+    assert read_txt(tmp_path) == expected
+
+
+def test_json2txt_float_points(tmp_path):
+    objects = [
+        {'classId': 10, 'points': {'exterior': [[1.6, 1.6], [4.4, 4.4]]}},
+        {'classId': 11, 'points': {'exterior': [[2, 3], [7, 9]]}},
+    ]
+    (tmp_path / 'a.jpg.json').write_text(
+        json.dumps({'size': {'width': 10, 'height': 10}, 'objects': objects})
+    )
+    JSON2TXT(str(tmp_path), str(tmp_path), {10: 0, 11: 1}, str(tmp_path)).json2txt()
+
+    lines = []
+    for clss, obj in enumerate(objects):
+        (xmin, ymin), (xmax, ymax) = obj['points']['exterior']
+        coords = bbox2yolo(10, 10, xmin, ymin, xmax, ymax)
+        lines.append('{} {:.6f} {:.6f} {:.6f} {:.6f}\n'.format(clss, *coords))
+    assert read_txt(tmp_path) == ''.join(lines)
+
+
+def test_add_txt_keeps_existing(tmp_path):
+    images, txt = tmp_path / 'images', tmp_path / 'txt'
+    images.mkdir()
+    (images / 'a.jpg').touch()
+    (images / 'b.png').touch()
+    annotations = TXTAnnotations(str(images), str(txt))
+    (txt / 'a.txt').write_text('1 0.1 0.1 0.1 0.1\n', encoding='utf-8')
+
+    annotations.add_txt()
+    assert sorted(path.name for path in txt.iterdir()) == ['a.txt', 'b.txt']
+    assert (txt / 'a.txt').read_text(encoding='utf-8') == '1 0.1 0.1 0.1 0.1\n'
+    assert (txt / 'b.txt').read_text(encoding='utf-8') == ''
+
+
+def test_json2txt_map_class_override(tmp_path):
+    class ShiftJSON2TXT(JSON2TXT):
+        def map_class(self, class_id: int) -> int:
+            return self.map_config.get(class_id, class_id - 100)
+
+    objects = [
+        {'classId': 10, 'points': {'exterior': [[0, 0], [5, 5]]}},
+        {'classId': 107, 'points': {'exterior': [[0, 0], [5, 5]]}},
+    ]
+    (tmp_path / 'a.jpg.json').write_text(
+        json.dumps({'size': {'width': 10, 'height': 10}, 'objects': objects})
+    )
+    ShiftJSON2TXT(str(tmp_path), str(tmp_path), {10: 0}, str(tmp_path)).json2txt()
+
+    line = ' 0.250000 0.250000 0.500000 0.500000\n'
+    assert read_txt(tmp_path) == f'0{line}7{line}'
+
+
+def test_yolo2bbox_batch_same_as_scalar():
+    # boxes partly out of the image to check clipping and truncation
+    xywh = np.random.default_rng(0).uniform(-0.1, 1.1, (10_000, 4))
+    expected = [yolo2bbox(*box, 640, 480) for box in xywh.tolist()]
+    assert yolo2bbox_batch(xywh, 640, 480).tolist() == [list(box) for box in expected]
+
+
+@pytest.mark.parametrize('dtype', [np.int64, np.float64])
+def test_bbox2yolo_batch_same_as_scalar(dtype):
+    rng = np.random.default_rng(0)
+    mins = rng.uniform(0, 1000, (10_000, 2))
+    boxes = np.column_stack((mins, mins + rng.uniform(1, 900, (10_000, 2))))
+    boxes = boxes.astype(dtype)
+
+    expected = [bbox2yolo(1920, 1080, *box) for box in boxes.tolist()]
+    assert bbox2yolo_batch(1920, 1080, boxes).tolist() == [
+        list(coords) for coords in expected
+    ]